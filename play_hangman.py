@@ -1,13 +1,113 @@
 """
 Interactive Hangman Game - Play against the AI or let AI play
-Uses trained HMM model from hmm_model.pkl
+Uses trained HMM model from hmm_model.pkl (legacy dict models are cached
+as letter-count tables in hmm_model.npy on first load)
 """
 
 import pickle
 import os
 import random
+import sys
 from collections import Counter
 
+import numpy as np
+
+# Letter counts a-z in a string, as a 26-entry array
+def count_letters(text):
+    data = text.encode('ascii', 'ignore') if isinstance(text, str) else text
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=128)[97:123]
+
+# Fewest corpus words a length needs before it gets its own prior
+MIN_LENGTH_PRIOR_WORDS = 50
+
+# Unigram fallback for legacy (dict) HMM pickles; length_counts optionally
+# maps a word length to its own 26 letter counts
+class HMMAdapter:
+    def __init__(self, lf, length_counts=None):
+        self.letter_freq = Counter(lf)
+        # Normalise once over a-z only (the .npy cache keeps nothing else);
+        # every guess reuses the same base distribution
+        self._total = float(sum(self.letter_freq.get(c, 0) for c in 'abcdefghijklmnopqrstuvwxyz') or 1.0)
+        self._probs = np.array([self.letter_freq.get(c, 0) / self._total for c in 'abcdefghijklmnopqrstuvwxyz'], dtype=np.float32)
+        # The guess sequence never depends on the board, so fix it up front
+        self._order = np.argsort(-self._probs, kind='stable')
+        
+        self._probs_by_len = {}
+        self._order_by_len = {}
+        for length, counts in (length_counts or {}).items():
+            counts = np.asarray(counts, dtype=np.float32)
+            # Each word of this length contributes about `length` letters;
+            # lengths with too few words keep the global prior
+            if counts.sum() >= MIN_LENGTH_PRIOR_WORDS * length:
+                probs = counts / counts.sum()
+                self._probs_by_len[length] = probs
+                self._order_by_len[length] = np.argsort(-probs, kind='stable')
+    
+    def _probs_for(self, length):
+        return self._probs_by_len.get(length, self._probs)
+    
+    def _order_for(self, length):
+        return self._order_by_len.get(length, self._order)
+    
+    def _guessed_indices(self, guessed_letters):
+        return [ord(g) - 97 for g in guessed_letters]
+    
+    def predict_letter_probabilities(self, masked_word, guessed_letters):
+        probs = self._probs_for(len(masked_word)).copy()
+        probs[self._guessed_indices(guessed_letters)] = 0.0
+        return dict(zip('abcdefghijklmnopqrstuvwxyz', probs.tolist()))
+    
+    def get_best_guess(self, masked_word, guessed_letters):
+        # Guessed letters drop below any real probability, then one argmax
+        probs = self._probs_for(len(masked_word)).copy()
+        probs[self._guessed_indices(guessed_letters)] = -1.0
+        best = int(probs.argmax())
+        if probs[best] < 0:
+            return random.choice([c for c in 'abcdefghijklmnopqrstuvwxyz' if c not in guessed_letters])
+        return chr(97 + best)
+
+# Write the adapter's letter counts as a float32 matrix: row 0 holds the
+# global counts and row L the counts for words of length L
+def save_letter_freq(letter_freq, length_counts=None, path='hmm_model.npy'):
+    length_counts = length_counts or {}
+    table = np.zeros((max(length_counts, default=0) + 1, 26), dtype=np.float32)
+    table[0] = [letter_freq.get(c, 0) for c in 'abcdefghijklmnopqrstuvwxyz']
+    for length, counts in length_counts.items():
+        if length > 0:
+            table[length] = counts
+    # Write beside the target and swap it in, so a reader never sees a partial file
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, table)
+    os.replace(tmp_path, path)
+
+# Bit i is set iff letter chr(97 + i) is in the word; bit 26 marks any
+# character outside a-z, which no guess can reveal
+def word_mask(word):
+    mask = 0
+    for c in word:
+        i = ord(c) - 97
+        mask |= 1 << i if 0 <= i < 26 else 1 << 26
+    return mask
+
+# Play many silent games at once; orders gives the guess sequence as letter
+# indices, either one (26,) row shared by every game or one row per game.
+# Returns (won, wrong) arrays.
+def simulate_games(word_masks, orders, max_wrong):
+    orders = np.broadcast_to(orders, (len(word_masks), 26)).astype(np.uint32)
+    remaining = np.array(word_masks, dtype=np.uint32)
+    wrong = np.zeros(len(remaining), dtype=np.int64)
+    active = remaining != 0
+    for k in range(26):
+        if not active.any():
+            break
+        bits = np.left_shift(np.uint32(1), orders[:, k])
+        hit = (remaining & bits) != 0
+        wrong += active & ~hit
+        remaining = np.where(active, remaining & ~bits, remaining)
+        active &= (remaining != 0) & (wrong < max_wrong)
+    return remaining == 0, wrong
+
 # Load HMM model
 def load_hmm():
     if not os.path.exists('hmm_model.pkl'):
@@ -15,6 +115,17 @@ def load_hmm():
         print("Please run part2_rl_agent.ipynb first to train the model.")
         return None
     
+    # Letter-count tables converted from the current pickle skip unpickling
+    if os.path.exists('hmm_model.npy') and os.path.getmtime('hmm_model.npy') >= os.path.getmtime('hmm_model.pkl'):
+        # A damaged cache is ignored and rebuilt from the pickle below
+        try:
+            table = np.load('hmm_model.npy', mmap_mode='r')
+            if table.ndim == 2 and table.shape[1] == 26:
+                length_counts = {length: table[length] for length in range(1, len(table)) if table[length].any()}
+                return HMMAdapter(dict(zip('abcdefghijklmnopqrstuvwxyz', table[0].tolist())), length_counts)
+        except (OSError, ValueError, EOFError):
+            pass
+    
     with open('hmm_model.pkl', 'rb') as f:
         hmm = pickle.load(f)
     
@@ -22,52 +133,63 @@ def load_hmm():
     if isinstance(hmm, dict):
         print("Converting legacy HMM format...")
         letter_freq = hmm.get('letter_freq', None)
+        corpus_by_length = hmm.get('corpus_by_length', None)
+        if letter_freq is None or corpus_by_length is None:
+            with open('data/corpus.txt', 'rb') as f:
+                data = f.read().lower()
         if letter_freq is None:
-            # Build from corpus
-            with open('data/corpus.txt', 'r') as f:
-                corpus = [w.strip().lower() for w in f.readlines()]
-            letter_freq = Counter()
-            for word in corpus:
-                letter_freq.update(list(word))
+            # Build from corpus: one byte histogram, keeping only a-z
+            counts = count_letters(data)
+            letter_freq = Counter({chr(97 + i): int(counts[i]) for i in range(26)})
+        if corpus_by_length is None:
+            corpus_by_length = {}
+            for w in data.decode('ascii', 'ignore').splitlines():
+                corpus_by_length.setdefault(len(w), []).append(w)
         
-        class HMMAdapter:
-            def __init__(self, lf):
-                self.letter_freq = Counter(lf)
-            
-            def predict_letter_probabilities(self, masked_word, guessed_letters):
-                total = float(sum(self.letter_freq.values()) or 1.0)
-                probs = {l: (self.letter_freq.get(l, 0) / total) for l in 'abcdefghijklmnopqrstuvwxyz'}
-                for g in guessed_letters:
-                    probs[g] = 0.0
-                return probs
-            
-            def get_best_guess(self, masked_word, guessed_letters):
-                probs = self.predict_letter_probabilities(masked_word, guessed_letters)
-                valid = {l: p for l, p in probs.items() if l not in guessed_letters}
-                if not valid:
-                    return random.choice([c for c in 'abcdefghijklmnopqrstuvwxyz' if c not in guessed_letters])
-                return max(valid.items(), key=lambda x: x[1])[0]
-        
-        hmm = HMMAdapter(letter_freq)
+        # Length-conditional priors: one histogram per word length
+        length_counts = {length: count_letters(''.join(ws)) for length, ws in corpus_by_length.items()}
+        hmm = HMMAdapter(letter_freq, length_counts)
+        try:
+            save_letter_freq(hmm.letter_freq, length_counts)
+        except OSError:
+            pass
     
     return hmm
 
-# Load word list
+# Load word list (read once per process)
+_WORDS_CACHE = None
+
 def load_words():
+    global _WORDS_CACHE
+    if _WORDS_CACHE is not None:
+        return _WORDS_CACHE
+    
     if os.path.exists('data/test.txt'):
-        with open('data/test.txt', 'r') as f:
-            words = [w.strip().lower() for w in f.readlines()]
+        path = 'data/test.txt'
     elif os.path.exists('data/corpus.txt'):
-        with open('data/corpus.txt', 'r') as f:
-            words = [w.strip().lower() for w in f.readlines()]
+        path = 'data/corpus.txt'
     else:
+        path = None
+    
+    if path is None:
         words = ['python', 'hangman', 'machine', 'learning', 'algorithm']
+    else:
+        with open(path, 'rb') as f:
+            data = f.read()
+        words = data.decode('ascii', 'ignore').lower().splitlines()
+    _WORDS_CACHE = words
     return words
 
-# Display hangman
-def display_hangman(wrong_guesses):
-    stages = [
-        """
+# Map each letter of the word to the indices where it occurs
+def letter_positions(word):
+    positions = {}
+    for i, c in enumerate(word):
+        positions.setdefault(c, []).append(i)
+    return positions
+
+# Hangman drawings, indexed by number of wrong guesses
+_HANGMAN_STAGES = (
+    """
            ------
            |    |
            |
@@ -75,8 +197,8 @@ def display_hangman(wrong_guesses):
            |
            |
         --------
-        """,
-        """
+    """,
+    """
            ------
            |    |
            |    O
@@ -84,8 +206,8 @@ def display_hangman(wrong_guesses):
            |
            |
         --------
-        """,
-        """
+    """,
+    """
            ------
            |    |
            |    O
@@ -93,8 +215,8 @@ def display_hangman(wrong_guesses):
            |
            |
         --------
-        """,
-        """
+    """,
+    """
            ------
            |    |
            |    O
@@ -102,8 +224,8 @@ def display_hangman(wrong_guesses):
            |
            |
         --------
-        """,
-        """
+    """,
+    """
            ------
            |    |
            |    O
@@ -111,8 +233,8 @@ def display_hangman(wrong_guesses):
            |
            |
         --------
-        """,
-        """
+    """,
+    """
            ------
            |    |
            |    O
@@ -120,8 +242,8 @@ def display_hangman(wrong_guesses):
            |   /
            |
         --------
-        """,
-        """
+    """,
+    """
            ------
            |    |
            |    O
@@ -129,17 +251,32 @@ def display_hangman(wrong_guesses):
            |   / \\
            |
         --------
-        """
-    ]
-    return stages[min(wrong_guesses, 6)]
+    """
+)
+
+# Display hangman
+def display_hangman(wrong_guesses):
+    return _HANGMAN_STAGES[min(wrong_guesses, 6)]
 
 # Play as human against computer
 def play_human_mode(hmm, words):
     word = random.choice(words)
-    guessed_letters = set()
+    guessed = 0  # bit i set once chr(97 + i) has been guessed
+    guessed_display = 'none'
     wrong_guesses = 0
     max_wrong = 6
     
+    # Reveal state is updated in place, only on hits
+    masked = bytearray(b'_' * len(word))
+    positions = letter_positions(word)
+    remaining = len(word)
+    
+    # Status panel pieces are rebuilt only when the matching state changes;
+    # panel is None whenever it has to be re-rendered
+    word_line = f"\nWord: {' '.join(masked.decode())}"
+    wrong_line = f"Wrong guesses: {wrong_guesses}/{max_wrong}"
+    panel = None
+    
     print("\n" + "="*50)
     print("🎮 HANGMAN GAME - You vs AI Word")
     print("="*50)
@@ -148,14 +285,12 @@ def play_human_mode(hmm, words):
     
     while wrong_guesses < max_wrong:
         # Show current state
-        masked = ''.join([c if c in guessed_letters else '_' for c in word])
-        print(display_hangman(wrong_guesses))
-        print(f"\nWord: {' '.join(masked)}")
-        print(f"Wrong guesses: {wrong_guesses}/{max_wrong}")
-        print(f"Guessed letters: {' '.join(sorted(guessed_letters)) if guessed_letters else 'none'}")
+        if panel is None:
+            panel = '\n'.join([display_hangman(wrong_guesses), word_line, wrong_line, f"Guessed letters: {guessed_display}"])
+        print(panel)
         
         # Check win
-        if '_' not in masked:
+        if remaining == 0:
             print("\n🎉 YOU WIN! 🎉")
             print(f"The word was: {word}")
             return True
@@ -163,21 +298,29 @@ def play_human_mode(hmm, words):
         # Get guess
         guess = input("\nGuess a letter: ").lower().strip()
         
-        if len(guess) != 1 or not guess.isalpha():
+        if len(guess) != 1 or not 'a' <= guess <= 'z':
             print("❌ Please enter a single letter!")
             continue
         
-        if guess in guessed_letters:
+        bit = 1 << (ord(guess) - 97)
+        if guessed & bit:
             print("❌ You already guessed that letter!")
             continue
         
-        guessed_letters.add(guess)
+        guessed |= bit
+        guessed_display = ' '.join(chr(97 + i) for i in range(26) if (guessed >> i) & 1)
+        panel = None
         
-        if guess in word:
+        if guess in positions:
+            for i in positions[guess]:
+                masked[i] = ord(guess)
+            remaining -= len(positions[guess])
+            word_line = f"\nWord: {' '.join(masked.decode())}"
             print(f"✓ Good guess! '{guess}' is in the word!")
         else:
             print(f"✗ Sorry, '{guess}' is not in the word.")
             wrong_guesses += 1
+            wrong_line = f"Wrong guesses: {wrong_guesses}/{max_wrong}"
     
     # Lost
     print(display_hangman(wrong_guesses))
@@ -193,35 +336,44 @@ def watch_ai_play(hmm, words, num_games=5):
     wins = 0
     total_wrong = 0
     
+    n_words = len(words)
     for game_num in range(num_games):
-        word = random.choice(words)
+        word = words[random.randrange(n_words)]
         guessed_letters = set()
         wrong_guesses = 0
         max_wrong = 6
+        masked = bytearray(b'_' * len(word))
+        positions = letter_positions(word)
+        remaining = len(word)
         
-        print(f"\n--- Game {game_num + 1}/{num_games} ---")
-        print(f"Secret word: {'*' * len(word)} ({len(word)} letters)")
+        # Buffer the game's lines and write them in one go at the end
+        log = [
+            f"\n--- Game {game_num + 1}/{num_games} ---",
+            f"Secret word: {'*' * len(word)} ({len(word)} letters)",
+        ]
         
         while wrong_guesses < max_wrong:
-            masked = ''.join([c if c in guessed_letters else '_' for c in word])
-            
-            if '_' not in masked:
-                print(f"✓ AI WIN! Word: {word}")
+            if remaining == 0:
+                log.append(f"✓ AI WIN! Word: {word}")
                 wins += 1
                 break
             
             # AI makes guess
-            guess = hmm.get_best_guess(masked, guessed_letters)
+            guess = hmm.get_best_guess(masked.decode(), guessed_letters)
             guessed_letters.add(guess)
             
-            if guess in word:
-                print(f"  AI guessed '{guess}' ✓ → {' '.join(masked)}")
+            if guess in positions:
+                for i in positions[guess]:
+                    masked[i] = ord(guess)
+                remaining -= len(positions[guess])
+                log.append(f"  AI guessed '{guess}' ✓ → {' '.join(masked.decode())}")
             else:
                 wrong_guesses += 1
-                print(f"  AI guessed '{guess}' ✗ (Wrong: {wrong_guesses}/{max_wrong})")
+                log.append(f"  AI guessed '{guess}' ✗ (Wrong: {wrong_guesses}/{max_wrong})")
         
         if wrong_guesses >= max_wrong:
-            print(f"✗ AI LOST! Word was: {word}")
+            log.append(f"✗ AI LOST! Word was: {word}")
+        sys.stdout.write('\n'.join(log) + '\n')
         
         total_wrong += wrong_guesses
     
@@ -242,38 +394,39 @@ def ai_battle(hmm, words):
     
     num_games = 20
     hmm_wins = 0
-    random_wins = 0
     
-    for game_num in range(num_games):
-        word = random.choice(words)
-        
-        # HMM AI plays
-        guessed = set()
-        wrong = 0
-        while wrong < 6:
-            masked = ''.join([c if c in guessed else '_' for c in word])
-            if '_' not in masked:
-                hmm_wins += 1
-                break
-            guess = hmm.get_best_guess(masked, guessed)
-            guessed.add(guess)
-            if guess not in word:
-                wrong += 1
-        
-        # Random AI plays
-        guessed = set()
-        wrong = 0
-        alphabet = list('abcdefghijklmnopqrstuvwxyz')
-        random.shuffle(alphabet)
-        while wrong < 6:
-            masked = ''.join([c if c in guessed else '_' for c in word])
-            if '_' not in masked:
-                random_wins += 1
-                break
-            guess = [c for c in alphabet if c not in guessed][0]
-            guessed.add(guess)
-            if guess not in word:
-                wrong += 1
+    game_words = [words[i] for i in np.random.randint(0, len(words), size=num_games)]
+    word_masks = np.array([word_mask(w) for w in game_words], dtype=np.uint32)
+    
+    # HMM AI plays (unigram adapters are simulated without per-guess Python calls)
+    if isinstance(hmm, HMMAdapter):
+        orders = np.stack([hmm._order_for(len(w)) for w in game_words])
+        won, _ = simulate_games(word_masks, orders, 6)
+        hmm_wins = int(won.sum())
+    else:
+        for word in game_words:
+            positions = letter_positions(word)
+            guessed = set()
+            wrong = 0
+            masked = bytearray(b'_' * len(word))
+            remaining = len(word)
+            while wrong < 6:
+                if remaining == 0:
+                    hmm_wins += 1
+                    break
+                guess = hmm.get_best_guess(masked.decode(), guessed)
+                guessed.add(guess)
+                if guess in positions:
+                    for i in positions[guess]:
+                        masked[i] = ord(guess)
+                    remaining -= len(positions[guess])
+                else:
+                    wrong += 1
+    
+    # Random AI plays: every game walks its own shuffled alphabet
+    orders = np.argsort(np.random.random((num_games, 26)), axis=1)
+    won, _ = simulate_games(word_masks, orders, 6)
+    random_wins = int(won.sum())
     
     print(f"\nResults after {num_games} games:")
     print(f"  HMM AI wins: {hmm_wins} ({100*hmm_wins/num_games:.1f}%)")